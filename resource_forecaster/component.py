@@ -9,13 +9,18 @@
 Contains class for a simulation platform component used to simulate simple load and generator forecaster whose published states are determined by a file containing a simple time series of attribute values for each epoch.
 '''
 import asyncio
+from typing import Dict, List
+
+import orjson
 
 from tools.components import AbstractSimulationComponent
+from tools.messages import AbstractMessage, EpochMessage
 from tools.tools import FullLogger, load_environmental_variables
 from domain_messages.resource_forecast import ResourceForecastPowerMessage
 from tools.message.block import TimeSeriesBlock, ValueArrayBlock
 
 from resource_forecaster.components import SimulationComponents
+from resource_forecaster.resource_forecast_state_source import CsvFileResourceForecastStateSource
 
 # names of used environment variables
 RESOURCE_FORECAST_TOPIC = "RESOURCE_FORECAST_TOPIC"
@@ -32,6 +37,14 @@ ACCEPTED_RESOURCE_FORECAST_TYPES = [ "Load", "Generator" ]
 
 LOGGER = FullLogger( __name__ )
 
+def message_to_bytes(message: AbstractMessage) -> bytes:
+    '''
+    Serialize the given message to UTF-8 encoded JSON bytes using orjson.
+    The content is the same JSON as from message.bytes() except that the output has no whitespace between items,
+    non-ASCII characters are not escaped and non-finite float values such as NaN are written as null.
+    '''
+    return orjson.dumps(message.json())
+
 class StaticTimeSeriesResourceForecaster(AbstractSimulationComponent):
     '''
     A simulation platform component used to simulate simple load and generator forecaster whose published states are determined by a file containing a simple time series of attribute values for each epoch.
@@ -68,6 +81,26 @@ class StaticTimeSeriesResourceForecaster(AbstractSimulationComponent):
         
         for component, resource_forecast_type in zip(self._resource_forecast_component_ids, self._types):
             self._result_topics[component] = '.'.join( [ self._resource_forecast_topic, resource_forecast_type, component ])
+
+        # forecast blocks created during the current epoch keyed by their content so that components with identical forecasts can share one
+        self._forecast_cache = {}
+
+        # components without a resource type would have no topic to publish to
+        if self.initialization_error is None and len(self._types) < len(self._resource_forecast_component_ids):
+            self.initialization_error = f'Environment variable {RESOURCE_TYPES} should have a resource type for each component in {RESOURCE_FORECAST_COMPONENT_IDS}.'
+
+        # topic, component id, state source and message attributes which stay the same during the whole simulation
+        # for each published resource forecast in publishing order
+        self._publish_plan = tuple(
+            (self._result_topics[component], component, source, {
+                "SimulationId": self.simulation_id,
+                "Type": ResourceForecastPowerMessage.CLASS_MESSAGE_TYPE,
+                "SourceProcessId": self.component_name,
+                "ResourceId": component
+                })
+            for component, source in zip(self.__simulation_components.get_component_list(), self.__simulation_components.iter_sources())
+            if component in self._result_topics
+            )
             
     async def process_epoch(self) -> bool:
         '''
@@ -88,33 +121,46 @@ class StaticTimeSeriesResourceForecaster(AbstractSimulationComponent):
     async def _send_resource_forecast_message(self):
         '''
         Sends a ResourceForecast message for the current epoch.
+        Messages for all components are created first and then published one after another.
         '''
-        for component in self._resource_forecast_component_ids:
-            resourceForecast = self._get_resource_forecast_message(component)
-            await self._rabbitmq_client.send_message(self._result_topics[component], resourceForecast.bytes())
-        
-    def _get_resource_forecast_message(self, component) -> ResourceForecastPowerMessage:
+        # epoch specific values are the same for all components
+        epoch_message = self._latest_epoch_message
+        epoch_number = self._latest_epoch
+        triggering_message_ids = self._triggering_message_ids
+        get_message = self._get_resource_forecast_message
+        self._forecast_cache.clear()
+
+        messages = [ (topic, message_to_bytes(get_message(component, source, message_template, epoch_message, epoch_number, triggering_message_ids)))
+                     for topic, component, source, message_template in self._publish_plan ]
+        # RabbitmqClient publishes one message at a time so the messages are sent in order
+        for topic, message_bytes in messages:
+            await self._rabbitmq_client.send_message(topic, message_bytes)
+
+    def _get_resource_forecast_message(self, component: str, source: CsvFileResourceForecastStateSource, message_template: Dict[str, str],
+                                       epoch_message: EpochMessage, epoch_number: int, triggering_message_ids: List[str]) -> ResourceForecastPowerMessage:
         '''
-        Create a ResourceForecastMessage from the next resource state info available from the state source.
+        Create a ResourceForecastMessage for the component from the resource state info available from the given state source for the given epoch.
+        message_template contains the message attributes which do not change between epochs.
         '''
-        state = self.__simulation_components.get_component(component).getNextEpochData(self._latest_epoch_message, component)
+        state = source.getNextEpochData(epoch_message, component)
         
-        forecast = TimeSeriesBlock(TimeIndex=state.time_index,
-                                 Series={
-                                     "RealPower": ValueArrayBlock(
-                                         UnitOfMeasure=state.unit_of_measure,
-                                         Values=state.real_power)
-                                     }
-            )
+        forecast_key = ( state.time_index, state.real_power.tobytes(), state.unit_of_measure )
+        forecast = self._forecast_cache.get(forecast_key)
+        if forecast is None:
+            forecast = TimeSeriesBlock(TimeIndex=list(state.time_index),
+                                     Series={
+                                         "RealPower": ValueArrayBlock(
+                                             UnitOfMeasure=state.unit_of_measure,
+                                             Values=state.real_power.tolist())
+                                         }
+                )
+            self._forecast_cache[forecast_key] = forecast
         
         message = ResourceForecastPowerMessage(
-            SimulationId = self.simulation_id,
-            Type = ResourceForecastPowerMessage.CLASS_MESSAGE_TYPE,
-            SourceProcessId = self.component_name,
+            **message_template,
             MessageId = next(self._message_id_generator),
-            EpochNumber = self._latest_epoch,
-            TriggeringMessageIds = self._triggering_message_ids,
-            ResourceId = state.resource_id,
+            EpochNumber = epoch_number,
+            TriggeringMessageIds = triggering_message_ids,
             Forecast = forecast
             )
 
@@ -7,7 +7,7 @@
 
 """This module contains a class for keeping track of the simulation components."""
 
-from typing import List
+from typing import Iterator, List
 import tools.tools as tools
 from resource_forecaster.resource_forecast_state_source  import CsvFileResourceForecastStateSource, CsvFileError
 
@@ -17,46 +17,64 @@ class SimulationComponents():
     """Keeps a list of components for the simulation."""
 
     def __init__(self):
-        self.__components = {}
+        # component ids and their state sources in the order they were added
+        self.__component_ids = []
+        self.__components = []
+        # position of each component in the lists
+        self.__index = {}
         LOGGER.debug("New SimulationComponents object created.")
 
     def add_component(self, component: str, resource_state_csv_folder: str, resource_forecast_state_csv_delimiter: str, 
                       forecast_horizon: str, unit_of_measure: str):
         """Adds a new component to the simulation component list.
            If the given component is already in the list, the function prints an error message."""
-        if component not in self.__components:
+        if component not in self.__index:
             try:
-                self.__components[component] = CsvFileResourceForecastStateSource(resource_state_csv_folder+component+".csv",
-                                                                                       forecast_horizon, unit_of_measure,
-                                                                                       resource_forecast_state_csv_delimiter)
+                source = CsvFileResourceForecastStateSource(resource_state_csv_folder+component+".csv",
+                                                            forecast_horizon, unit_of_measure,
+                                                            resource_forecast_state_csv_delimiter)
                 initialization_error = None
-                LOGGER.info("Component: {:s} registered to SimulationComponents.".format(component))
             except CsvFileError as error:
-                self.__components[component] = None
+                source = None
                 initialization_error = f'Unable to create a csv file resource forecast state source for the component: {str( error )}'
                 LOGGER.warning("Component: {:s} {:s}".format(component, initialization_error))
+
+            self.__index[component] = len(self.__components)
+            self.__component_ids.append(component)
+            self.__components.append(source)
+            if source is not None:
+                LOGGER.info("Component: {:s} registered to SimulationComponents.".format(component))
         else:
-            LOGGER.warning("{:s} is already registered to the simulation component list".format(component_id))    
+            LOGGER.warning("{:s} is already registered to the simulation component list".format(component))    
 
     def remove_component(self, component: str):
         """Removes the given component from the simulation component list.
            If the given component is not found in the list, the function prints an error message."""
-        if self.__components.pop(component, None) is None:
+        position = self.__index.pop(component, None)
+        if position is None:
             LOGGER.warning("{:s} was not found in the simulation component list".format(component))
         else:
+            del self.__component_ids[position]
+            del self.__components[position]
+            for moved_position, moved_component in enumerate(self.__component_ids[position:], position):
+                self.__index[moved_component] = moved_position
             LOGGER.info("Component: {:s} removed from SimulationComponents.".format(component))
     
     def get_component(self, component):
         """Returns component object"""
-        return self.__components[component]
+        return self.__components[self.__index[component]]
+
+    def iter_sources(self) -> Iterator[CsvFileResourceForecastStateSource]:
+        """Returns an iterator over the component objects in the same order as get_component_list."""
+        return iter(self.__components)
 
     def get_component_list(self, latest_epoch_less_than=None) -> List[str]:
         """Returns a list of the registered simulation components."""
         if latest_epoch_less_than is None:
-            return list(self.__components.keys())
+            return list(self.__component_ids)
         return [
             component
-            for component, component_status in self.__components.items()
+            for component, component_status in zip(self.__component_ids, self.__components)
             if component_status.epoch_number < latest_epoch_less_than
         ]
 
@@ -65,5 +83,5 @@ class SimulationComponents():
         return ", ".join([
             "{:s}".format(
                 component)
-            for component, component_status in self.__components.items()
-        ])
\ No newline at end of file
+            for component in self.__component_ids
+        ])
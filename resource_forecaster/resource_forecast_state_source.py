@@ -11,20 +11,68 @@ Contains classes related to reading the resource forecast state from a csv file.
 import isodate
 import csv
 
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
 from dataclasses import dataclass
+from typing import Sequence, Tuple
 
-@dataclass
+@dataclass(frozen = True)
 class ResourceForecastState():
     '''
     Represents resource forecast state read from the csv file.
+    A new immutable state is created for each epoch.
     ''' 
+    # dataclass(slots = True) requires Python 3.10 so slots are declared explicitly
+    __slots__ = ( 'unit_of_measure', 'time_index', 'real_power', 'resource_id' )
     
     unit_of_measure: str
-    time_index: list
-    real_power: list
+    time_index: Tuple[str, ...]
+    real_power: array
     resource_id: str
 
 
+def parse_datetime(value: str) -> datetime:
+    '''
+    Parse the given ISO 8601 date time string.
+    Uses datetime.fromisoformat for the common formats and falls back to isodate for the rest.
+    '''
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    
+    except ValueError:
+        return isodate.parse_datetime(value)
+
+# reference point and unit for converting date times to integer timestamps
+_EPOCH = datetime(1970, 1, 1, tzinfo = timezone.utc)
+_MICROSECOND = timedelta(microseconds = 1)
+
+def _to_timestamp(value: datetime) -> int:
+    '''
+    Convert the given date time to integer microseconds since the Unix epoch.
+    Date times without a time zone are treated as UTC.
+    '''
+    if value.tzinfo is None:
+        value = value.replace(tzinfo = timezone.utc)
+    
+    return (value - _EPOCH) // _MICROSECOND
+
+def _window_indices(times: Sequence[int], start_time: int, end_time: int, lo: int = 0, window_rows: int = 0) -> Tuple[int, int]:
+    '''
+    Get the row indexes of a forecast window from the given sorted times.
+    The window starts from the first row at or after the start time and ends with the first row at or after the end time.
+    Only rows from lo onwards are searched so lo should be before the start time.
+    If window_rows is given a window of that many rows is checked first before searching for the end of the window.
+    Returns the index of the first row and the index after the last row which may be past the end of times.
+    '''
+    start = bisect_left(times, start_time, lo)
+    last = start + window_rows - 1
+    if window_rows > 0 and last < len(times) and times[last] >= end_time and (last == start or times[last - 1] < end_time):
+        return start, last + 1
+    
+    return start, bisect_left(times, end_time, start) + 1
+
 class CsvFileError(Exception):
     '''
     CsvFileResourceForecastStateSource was unable to read the given csv file or the file was missing a required column.
@@ -36,100 +84,114 @@ class NoDataAvailableForEpoch( Exception ):
 class CsvFileResourceForecastStateSource():
     '''
     Class for getting resource forecast states from a csv file.
+    The whole csv file is read and its values are converted when the object is created.
     '''
     
     def __init__(self, file_name: str, forecast_horizon: str, unit_of_measure: str, delimiter: str = ","):
         '''
         Create object which uses the given csv file that uses the given delimiter.
-        Raises CsvFileError if file cannot be read e.g. file not found, or it is missing required columns.
+        Raises CsvFileError if file cannot be read e.g. file not found, it is missing required columns,
+        a value from the file cannot be converted to the appropriate data type or the rows are not in time order.
         '''
         self._initial_state = True
         self._unit_of_measure = unit_of_measure
-        self._file = None # required if there is no file and the __del__ method is executed
+        # "If the ISO date string does not contain years or months, a timedelta instance is returned, else a Duration instance is returned."
+        self._forecast_horizon = isodate.parse_duration(forecast_horizon)
+        
         try:
-            self._file = open( file_name, newline = "")
-            
-        except Exception as e:
-            raise CsvFileError( f'Unable to read file {file_name}: {str( e )}.' )
+            with open( file_name, newline = "") as file:
+                data = csv.reader( file, delimiter = delimiter )
+                # check that the header row has required fields
+                required_fields = set( [ 'TimeIndex', 'RealPower'])
+                fields = next( data, [] )
+                # missing contains fields that do not exist or is empty if all fields exist.
+                missing = required_fields.difference( fields )
+                if len( missing ) > 0:
+                    raise CsvFileError( f'Resource state source csv file missing required columns: {",".join( missing )}.' )
+                
+                time_index_column = fields.index( 'TimeIndex' )
+                real_power_column = fields.index( 'RealPower' )
+                # time indexes as they are in the file, their parsed values and the real power values for each row.
+                # parsed times and real power values are stored as typed arrays of integer timestamps and doubles
+                # instead of lists of datetime and float objects.
+                # Rows are converted as they are read so that the whole file is never held in memory as row lists.
+                self._time_index = []
+                self._parsed_times = array( 'q' )
+                self._real_power = array( 'd' )
+                for row in data:
+                    # skip empty rows like csv.DictReader does
+                    if not row:
+                        continue
+                    
+                    time_index = row[time_index_column]
+                    timestamp = _to_timestamp( parse_datetime( time_index ))
+                    # the forecast window is searched by time so the rows must be in time order
+                    if len( self._parsed_times ) > 0 and timestamp < self._parsed_times[-1]:
+                        raise CsvFileError( f'Resource state source csv file rows are not in time order: {time_index} is before {self._time_index[-1]}.' )
+                    
+                    self._time_index.append( time_index )
+                    self._parsed_times.append( timestamp )
+                    self._real_power.append( float( row[real_power_column] ))
+                
+                # slices of a tuple are tuples which can be used in the immutable states as such
+                self._time_index = tuple( self._time_index )
         
-        self._csv = csv.DictReader( self._file, delimiter = delimiter )
-        # check that self._csv.fieldnames has required fields
-        required_fields = set( [ 'TimeIndex', 'RealPower'])
-        fields = set( self._csv.fieldnames )
-        # missing contains fields that do not exist or is empty if all fields exist.
-        missing = required_fields.difference( fields )
-        if len( missing ) > 0:
-            raise CsvFileError( f'Resource state source csv file missing required columns: {",".join( missing )}.' )
+        except CsvFileError:
+            raise
         
-        # "If the ISO date string does not contain years or months, a timedelta instance is returned, else a Duration instance is returned."
-        self._forecast_horizon = isodate.parse_duration(forecast_horizon)
+        except ValueError as e:
+            raise CsvFileError( f'Invalid value in file {file_name}: {str( e )}.' )
         
-        self._state = None
+        except Exception as e:
+            raise CsvFileError( f'Unable to read file {file_name}: {str( e )}.' )
         
-    def __del__(self):
-        '''
-        Close the csv file when this object is destroyed.
-        '''
-        if self._file != None:
-            self._file.close()
+        # forecast horizon length in microseconds. Not available if the horizon contains years or months whose length varies.
+        self._horizon_length = self._forecast_horizon // _MICROSECOND if isinstance(self._forecast_horizon, timedelta) else None
+        # number of rows in a forecast window starting from the first row or 0 if the file does not have enough rows for one window.
+        self._window_rows = 0
+        if len(self._parsed_times) > 0 and self._horizon_length is not None:
+            _, end = _window_indices(self._parsed_times, self._parsed_times[0], self._parsed_times[0] + self._horizon_length)
+            self._window_rows = end if end <= len(self._parsed_times) else 0
+        
+        # first row of the previous forecast window. Epochs normally move forward so the next window is searched from here.
+        self._window_start = 0
         
     def getNextEpochData(self, epoch_message, component) -> ResourceForecastState:
         '''
-        Get resource forecast i.e. read the next csv file for forecast horizon and return its contents.
-        Raises NoDataAvailableForEpoch if the csv file has no more rows.
-        Raises ValueError if a value from the csv file cannot be converted to the appropriate data type.
+        Get resource forecast i.e. find the csv file rows for the epoch start time and forecast horizon and return their contents.
+        Raises NoDataAvailableForEpoch if the csv file has no rows for the epoch.
         Returns remaining rows if simulation is ending. 
         '''
-        epoch_start_time = isodate.parse_datetime(epoch_message.start_time)
+        epoch_start_time = parse_datetime(epoch_message.start_time)
+        start_timestamp = _to_timestamp(epoch_start_time)
+        if self._horizon_length is not None:
+            end_timestamp = start_timestamp + self._horizon_length
+        else:
+            end_timestamp = _to_timestamp(epoch_start_time + self._forecast_horizon)
+        
+        row_count = len(self._parsed_times)
         
         values = {} # values for ResourceForecastState attributes
         values['resource_id'] = component
         values['unit_of_measure'] = self._unit_of_measure
         
-        if self._initial_state:
-            # Initialize first items for while loop
-            time_index = []
-            series = []
-            try:
-                row = next(self._csv)
-                current_time_index = isodate.parse_datetime(row['TimeIndex'])
-                if current_time_index == epoch_start_time:
-                    time_index.append(row['TimeIndex'])
-                    series.append(float(row['RealPower']))
-                elif current_time_index > epoch_start_time:
-                    raise NoDataAvailableForEpoch( 'The source csv file does not have data for this epoch start time.')
-            except StopIteration:
-                raise NoDataAvailableForEpoch( 'The source csv file does not have any rows remaining.' )
-            
-            # Collect rest of the items
-            try:
-                while current_time_index < epoch_start_time + self._forecast_horizon:
-                    row = next(self._csv)
-                    current_time_index = isodate.parse_datetime(row['TimeIndex'])
-                    if current_time_index >= epoch_start_time:
-                        time_index.append(row['TimeIndex'])
-                        series.append(float(row['RealPower']))
-            except StopIteration:
+        if row_count == 0 or self._parsed_times[0] > start_timestamp:
+            raise NoDataAvailableForEpoch( 'The source csv file does not have data for this epoch start time.')
+        
+        lo = self._window_start if self._window_start < row_count and self._parsed_times[self._window_start] < start_timestamp else 0
+        start, end = _window_indices(self._parsed_times, start_timestamp, end_timestamp, lo, self._window_rows)
+        if start == row_count:
+            raise NoDataAvailableForEpoch( 'The source csv file does not have any rows remaining.' )
+        
+        if end > row_count:
+            if self._initial_state:
                 raise NoDataAvailableForEpoch( 'The source csv file does not have any rows remaining.' )
             
-            values['time_index'] = time_index
-            values['real_power'] = series
-            self._initial_state = False
-        else:
-            try:
-                time_index = self._state.time_index
-                time_index.pop(0)
-                series = self._state.real_power
-                series.pop(0)
-                row = next(self._csv)
-                time_index.append(row['TimeIndex'])
-                series.append(float(row['RealPower']))
-                values['time_index'] = time_index
-                values['real_power'] = series
-            except StopIteration:
-                # Simulation ending. Return last rows until the end. Might want to implement check if last row in csv instead of this
-                values['time_index'] = time_index
-                values['real_power'] = series
+            # Simulation ending. Return last rows until the end. Might want to implement check if last row in csv instead of this
+            end = row_count
         
-        self._state = ResourceForecastState( **values )
-        return self._state
\ No newline at end of file
+        self._initial_state = False
+        self._window_start = start
+        values['time_index'] = self._time_index[start:end]
+        values['real_power'] = self._real_power[start:end]
+        return ResourceForecastState( **values )
@@ -14,6 +14,7 @@ import os
 import pathlib
 import csv
 import isodate
+from array import array
 
 from tools.messages import AbstractMessage
 from tools.message.block import TimeSeriesBlock, ValueArrayBlock
@@ -48,44 +49,27 @@ class ResourceForecastStateMessageGenerator( MessageGenerator ):
         super().__init__( simulation_id, process_id)
         # read expected resource states from csv.
         with open( pathlib.Path( __file__ ).parent.absolute() / 'test1.csv', newline = '', encoding = 'utf-8') as file:
-            data = csv.DictReader( file, delimiter = ',' )
-            forecast_horizon = isodate.parse_duration(os.environ[FORECAST_HORIZON])
-            # for each epoch a tuple consisting of expected state and is a warning expected on that epoch.
-            # epoch 0 has no state
-            self.states = {}
-            init = True
-            i = 1
-            series = []
-            time_index_list = []
-            if init:
-                # Initialize first items for while loop
-                row = next(data)
-                current_time_index = isodate.parse_datetime(row['TimeIndex'])
-                first_time_index = isodate.parse_datetime(row['TimeIndex'])
-                time_index_list.append(row['TimeIndex'])
-                series.append(float(row['RealPower']))
-                while current_time_index < first_time_index + forecast_horizon:
-                    row = next(data)
-                    current_time_index = isodate.parse_datetime(row['TimeIndex'])
-                    time_index_list.append(row['TimeIndex'])
-                    series.append(float(row['RealPower']))
-                init = False
-                self.states[i] = ResourceForecastState( real_power = series, time_index = time_index_list,
-                                                               unit_of_measure='kW', resource_id='test1')
-            while i <= SIMULATION_EPOCHS:
-                series = list(series)
-                time_index_list = list(time_index_list)
-                try:
-                    i += 1
-                    time_index_list.pop(0)
-                    series.pop(0)
-                    row = next(data)
-                    time_index_list.append(row['TimeIndex'])
-                    series.append(float(row['RealPower']))
-                    self.states[i] = ResourceForecastState( real_power = series, time_index = time_index_list,
-                                                               unit_of_measure='kW', resource_id='test1')
-                except StopIteration:
-                    raise NoDataAvailableForEpoch( 'The source csv file does not have any rows remaining.' )
+            rows = list( csv.DictReader( file, delimiter = ',' ))
+        
+        forecast_horizon = isodate.parse_duration(os.environ[FORECAST_HORIZON])
+        time_index_list = tuple( row['TimeIndex'] for row in rows )
+        series = array( 'd', ( float( row['RealPower'] ) for row in rows ))
+        # number of rows in a forecast: rows until the first one at or after the end of the forecast horizon
+        first_time_index = isodate.parse_datetime( time_index_list[0] )
+        horizon_rows = 1
+        while isodate.parse_datetime( time_index_list[horizon_rows - 1] ) < first_time_index + forecast_horizon:
+            horizon_rows += 1
+        
+        # the expected state for each epoch. Each epoch moves the forecast one row forward.
+        # epoch 0 has no state
+        self.states = {}
+        for i in range( 1, SIMULATION_EPOCHS + 2 ):
+            if i - 1 + horizon_rows > len( rows ):
+                raise NoDataAvailableForEpoch( 'The source csv file does not have any rows remaining.' )
+            
+            self.states[i] = ResourceForecastState( real_power = series[i - 1:i - 1 + horizon_rows],
+                                                    time_index = time_index_list[i - 1:i - 1 + horizon_rows],
+                                                    unit_of_measure='kW', resource_id='test1')
 
     def get_resource_forecast_state_message(self, epoch_number: int, triggering_message_ids: List[str]) -> Union[ResourceForecastPowerMessage, None]:
         """Get the expected ResourceForecastPowerMessage for the given epoch."""
@@ -95,11 +79,11 @@ class ResourceForecastStateMessageGenerator( MessageGenerator ):
         # get the resource forecast state for this epoch.
         state  = self.states[ epoch_number ]
         self.latest_message_id = next(self.id_generator)
-        forecast = TimeSeriesBlock(TimeIndex=state.time_index,
+        forecast = TimeSeriesBlock(TimeIndex=list(state.time_index),
                                   Series={
                                       "RealPower": ValueArrayBlock(
                                           UnitOfMeasure=state.unit_of_measure,
-                                          Values=state.real_power)
+                                          Values=state.real_power.tolist())
                                       }
             )
         
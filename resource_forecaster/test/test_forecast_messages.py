@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+'''
+Tests for creating resource forecast messages without a connection to the message bus.
+'''
+
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from aiounittest.case import AsyncTestCase
+
+from tools.exceptions.messages import MessageValueError
+
+from resource_forecaster.component import StaticTimeSeriesResourceForecaster
+from resource_forecaster.resource_forecast_state_source import CsvFileResourceForecastStateSource
+
+# hourly test data from 00:00 to 05:00
+CSV_CONTENT = '''TimeIndex,RealPower
+2020-01-01T00:00:00Z,0.1
+2020-01-01T01:00:00Z,0.2
+2020-01-01T02:00:00Z,0.3
+2020-01-01T03:00:00Z,0.4
+2020-01-01T04:00:00Z,0.5
+2020-01-01T05:00:00Z,0.6
+'''
+
+# same times as in CSV_CONTENT with different values
+OTHER_CSV_CONTENT = '''TimeIndex,RealPower
+2020-01-01T00:00:00Z,1.1
+2020-01-01T01:00:00Z,1.2
+2020-01-01T02:00:00Z,1.3
+2020-01-01T03:00:00Z,1.4
+2020-01-01T04:00:00Z,1.5
+2020-01-01T05:00:00Z,1.6
+'''
+
+TRIGGERING_MESSAGE_IDS = [ 'Manager-1' ]
+
+def epoch_message(start_time: str) -> SimpleNamespace:
+    '''
+    Create an object with the epoch start time which is the only epoch message attribute used by the state source.
+    '''
+    return SimpleNamespace(start_time = start_time)
+
+class RecordingRabbitmqClient():
+    '''
+    Stores the sent messages instead of publishing them.
+    '''
+
+    def __init__(self):
+        self.sent_messages = []
+
+    async def send_message(self, topic_name: str, message_bytes: bytes):
+        self.sent_messages.append( ( topic_name, message_bytes ) )
+
+class TestForecastMessages( AsyncTestCase ):
+    """Unit tests for the forecasts of the created ResourceForecastPower messages."""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        for component, content in [ ( 'load1', CSV_CONTENT ), ( 'load2', CSV_CONTENT ), ( 'load3', OTHER_CSV_CONTENT ) ]:
+            with open( os.path.join( self._folder.name, component +'.csv' ), 'w', newline = '', encoding = 'utf-8' ) as file:
+                file.write( content )
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def create_component(self, component_ids: str = 'load1,load2,load3', resource_types: str = 'Load,Load,Load') -> StaticTimeSeriesResourceForecaster:
+        '''
+        Create a forecaster using the csv files in the test folder.
+        '''
+        return StaticTimeSeriesResourceForecaster( component_ids, self._folder.name +os.sep, ',', 'ResourceForecaster', resource_types,
+                                                   'ResourceForecastState', 'PT2H', 'kW' )
+
+    def get_messages(self, forecaster: StaticTimeSeriesResourceForecaster, start_time: str, epoch_number: int = 1) -> dict:
+        '''
+        Create the resource forecast messages of the given epoch for each component in the publish plan.
+        '''
+        return { component: forecaster._get_resource_forecast_message( component, source, message_template, epoch_message( start_time ),
+                                                                         epoch_number, TRIGGERING_MESSAGE_IDS )
+                 for _, component, source, message_template in forecaster._publish_plan }
+
+    async def test_same_window_shares_forecast(self):
+        """Components with the same forecast window and values share one forecast block."""
+        forecaster = self.create_component()
+        messages = self.get_messages( forecaster, '2020-01-01T00:00:00Z' )
+        self.assertIs( messages['load1'].forecast, messages['load2'].forecast )
+        self.assertEqual( messages['load1'].forecast.time_index, [ '2020-01-01T00:00:00.000Z', '2020-01-01T01:00:00.000Z', '2020-01-01T02:00:00.000Z' ] )
+        self.assertEqual( messages['load1'].resource_id, 'load1' )
+        self.assertEqual( messages['load2'].resource_id, 'load2' )
+        self.assertNotEqual( messages['load1'].message_id, messages['load2'].message_id )
+
+    async def test_different_values_do_not_share_forecast(self):
+        """Components with the same window times but different values get their own forecast block."""
+        forecaster = self.create_component()
+        messages = self.get_messages( forecaster, '2020-01-01T00:00:00Z' )
+        self.assertIsNot( messages['load1'].forecast, messages['load3'].forecast )
+        self.assertEqual( messages['load3'].forecast.series['RealPower'].values, [ 1.1, 1.2, 1.3 ] )
+
+    async def test_different_window_does_not_share_forecast(self):
+        """A forecast for a different window is not taken from the cache."""
+        forecaster = self.create_component()
+        template = forecaster._publish_plan[0][3]
+        source = forecaster._publish_plan[0][2]
+        first = forecaster._get_resource_forecast_message( 'load1', source, template, epoch_message( '2020-01-01T00:00:00Z' ), 1, TRIGGERING_MESSAGE_IDS )
+        second = forecaster._get_resource_forecast_message( 'load1', source, template, epoch_message( '2020-01-01T01:00:00Z' ), 1, TRIGGERING_MESSAGE_IDS )
+        self.assertIsNot( first.forecast, second.forecast )
+        self.assertEqual( second.forecast.time_index, [ '2020-01-01T01:00:00.000Z', '2020-01-01T02:00:00.000Z', '2020-01-01T03:00:00.000Z' ] )
+
+    async def test_different_unit_does_not_share_forecast(self):
+        """A forecast with the same values in a different unit of measure is not taken from the cache."""
+        forecaster = self.create_component()
+        template = forecaster._publish_plan[0][3]
+        kw_source = forecaster._publish_plan[0][2]
+        mw_source = CsvFileResourceForecastStateSource( os.path.join( self._folder.name, 'load1.csv' ), 'PT2H', 'MW' )
+        kw_message = forecaster._get_resource_forecast_message( 'load1', kw_source, template, epoch_message( '2020-01-01T00:00:00Z' ), 1, TRIGGERING_MESSAGE_IDS )
+        # the message accepts only kW forecasts but the MW forecast block is created and cached before that is checked
+        with self.assertRaises( MessageValueError ):
+            forecaster._get_resource_forecast_message( 'load1', mw_source, template, epoch_message( '2020-01-01T00:00:00Z' ), 1, TRIGGERING_MESSAGE_IDS )
+
+        forecasts = list( forecaster._forecast_cache.values() )
+        self.assertEqual( len( forecasts ), 2 )
+        self.assertIs( forecasts[0], kw_message.forecast )
+        self.assertEqual( forecasts[1].series['RealPower'].unit_of_measure, 'MW' )
+
+    async def test_cache_cleared_every_epoch(self):
+        """Only the forecasts of the current epoch are kept in the cache."""
+        forecaster = self.create_component()
+        forecaster._rabbitmq_client = RecordingRabbitmqClient()
+        forecaster._triggering_message_ids = TRIGGERING_MESSAGE_IDS
+        for epoch_number, start_time in [ ( 1, '2020-01-01T00:00:00Z' ), ( 2, '2020-01-01T01:00:00Z' ) ]:
+            forecaster._latest_epoch = epoch_number
+            forecaster._latest_epoch_message = epoch_message( start_time )
+            await forecaster._send_resource_forecast_message()
+            self.assertEqual( len( forecaster._forecast_cache ), 2 )
+            self.assertTrue( all( time_index[0] == start_time for time_index, _, _ in forecaster._forecast_cache ) )
+
+        self.assertEqual( [ topic for topic, _ in forecaster._rabbitmq_client.sent_messages ],
+                          [ 'ResourceForecastState.Load.' +component for component in [ 'load1', 'load2', 'load3' ] *2 ] )
+
+    async def test_missing_resource_type(self):
+        """A component without a resource type is an initialization error and is left out of the publish plan."""
+        forecaster = self.create_component( 'load1,load2', 'Load' )
+        self.assertIsNotNone( forecaster.initialization_error )
+        self.assertEqual( [ component for _, component, _, _ in forecaster._publish_plan ], [ 'load1' ] )
+
+    async def test_extra_resource_types(self):
+        """Extra resource types without a component are ignored."""
+        forecaster = self.create_component( 'load1,load2', 'Load,Generator,Load' )
+        self.assertIsNone( forecaster.initialization_error )
+        self.assertEqual( [ topic for topic, _, _, _ in forecaster._publish_plan ],
+                          [ 'ResourceForecastState.Load.load1', 'ResourceForecastState.Generator.load2' ] )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+'''
+Tests for the CsvFileResourceForecastStateSource class.
+'''
+
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from resource_forecaster.resource_forecast_state_source import CsvFileResourceForecastStateSource, CsvFileError, NoDataAvailableForEpoch
+
+# hourly test data from 00:00 to 05:00
+CSV_CONTENT = '''TimeIndex,RealPower
+2020-01-01T00:00:00Z,0.1
+2020-01-01T01:00:00Z,0.2
+2020-01-01T02:00:00Z,0.3
+2020-01-01T03:00:00Z,0.4
+2020-01-01T04:00:00Z,0.5
+2020-01-01T05:00:00Z,0.6
+'''
+
+def epoch_message(start_time: str) -> SimpleNamespace:
+    '''
+    Create an object with the epoch start time which is the only epoch message attribute used by the state source.
+    '''
+    return SimpleNamespace(start_time = start_time)
+
+class TestCsvFileResourceForecastStateSource( unittest.TestCase ):
+    """Unit tests for reading resource forecast states from a csv file."""
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def create_source(self, content: str = CSV_CONTENT, forecast_horizon: str = 'PT2H') -> CsvFileResourceForecastStateSource:
+        '''
+        Write the given content to a csv file and create a state source using it.
+        '''
+        file_name = os.path.join( self._folder.name, 'test.csv' )
+        with open( file_name, 'w', newline = '', encoding = 'utf-8' ) as file:
+            file.write( content )
+
+        return CsvFileResourceForecastStateSource( file_name, forecast_horizon, 'kW' )
+
+    def test_window_for_epoch_start(self):
+        """Window contains rows from the epoch start up to and including the first row at or after the end of the forecast horizon."""
+        source = self.create_source()
+        state = source.getNextEpochData( epoch_message( '2020-01-01T01:00:00Z' ), 'load1' )
+        self.assertEqual( state.resource_id, 'load1' )
+        self.assertEqual( state.unit_of_measure, 'kW' )
+        self.assertEqual( list( state.time_index ), [ '2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z', '2020-01-01T03:00:00Z' ] )
+        self.assertEqual( state.real_power.tolist(), [ 0.2, 0.3, 0.4 ] )
+
+    def test_window_starting_between_rows(self):
+        """Window starts from the first row after the epoch start when the start is between rows."""
+        source = self.create_source()
+        state = source.getNextEpochData( epoch_message( '2020-01-01T00:30:00Z' ), 'load1' )
+        self.assertEqual( list( state.time_index ), [ '2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z', '2020-01-01T03:00:00Z' ] )
+        self.assertEqual( state.real_power.tolist(), [ 0.2, 0.3, 0.4 ] )
+
+    def test_epochs_shorter_than_row_interval(self):
+        """With hourly rows and 15 minute epochs consecutive epochs get the same window until the next row is passed."""
+        source = self.create_source()
+        first_window = [ '2020-01-01T00:00:00Z', '2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z' ]
+        second_window = [ '2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z', '2020-01-01T03:00:00Z' ]
+        third_window = [ '2020-01-01T02:00:00Z', '2020-01-01T03:00:00Z', '2020-01-01T04:00:00Z' ]
+        expected_windows = [
+            ( '2020-01-01T00:00:00Z', first_window ),
+            ( '2020-01-01T00:15:00Z', second_window ),
+            ( '2020-01-01T00:30:00Z', second_window ),
+            ( '2020-01-01T00:45:00Z', second_window ),
+            ( '2020-01-01T01:00:00Z', second_window ),
+            ( '2020-01-01T01:15:00Z', third_window )
+            ]
+        for start_time, expected_window in expected_windows:
+            with self.subTest( start_time = start_time ):
+                state = source.getNextEpochData( epoch_message( start_time ), 'load1' )
+                self.assertEqual( list( state.time_index ), expected_window )
+
+    def test_earlier_and_repeated_epochs(self):
+        """Windows are found for an epoch earlier than the previous one and for a repeated epoch."""
+        source = self.create_source()
+        state = source.getNextEpochData( epoch_message( '2020-01-01T03:00:00Z' ), 'load1' )
+        self.assertEqual( list( state.time_index ), [ '2020-01-01T03:00:00Z', '2020-01-01T04:00:00Z', '2020-01-01T05:00:00Z' ] )
+        for start_time in [ '2020-01-01T01:00:00Z', '2020-01-01T01:00:00Z' ]:
+            state = source.getNextEpochData( epoch_message( start_time ), 'load1' )
+            self.assertEqual( list( state.time_index ), [ '2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z', '2020-01-01T03:00:00Z' ] )
+            self.assertEqual( state.real_power.tolist(), [ 0.2, 0.3, 0.4 ] )
+
+        state = source.getNextEpochData( epoch_message( '2020-01-01T00:00:00Z' ), 'load1' )
+        self.assertEqual( list( state.time_index ), [ '2020-01-01T00:00:00Z', '2020-01-01T01:00:00Z', '2020-01-01T02:00:00Z' ] )
+
+    def test_shortened_window_at_end_of_file(self):
+        """After the first epoch the remaining rows are returned when the file ends before the forecast horizon."""
+        source = self.create_source()
+        source.getNextEpochData( epoch_message( '2020-01-01T03:00:00Z' ), 'load1' )
+        state = source.getNextEpochData( epoch_message( '2020-01-01T04:00:00Z' ), 'load1' )
+        self.assertEqual( list( state.time_index ), [ '2020-01-01T04:00:00Z', '2020-01-01T05:00:00Z' ] )
+        self.assertEqual( state.real_power.tolist(), [ 0.5, 0.6 ] )
+        state = source.getNextEpochData( epoch_message( '2020-01-01T05:00:00Z' ), 'load1' )
+        self.assertEqual( list( state.time_index ), [ '2020-01-01T05:00:00Z' ] )
+        with self.assertRaises( NoDataAvailableForEpoch ):
+            source.getNextEpochData( epoch_message( '2020-01-01T06:00:00Z' ), 'load1' )
+
+    def test_first_window_past_end_of_file(self):
+        """The first epoch requires a full forecast horizon of rows."""
+        source = self.create_source()
+        with self.assertRaises( NoDataAvailableForEpoch ):
+            source.getNextEpochData( epoch_message( '2020-01-01T04:00:00Z' ), 'load1' )
+
+    def test_epoch_start_before_first_row(self):
+        """There is no data for an epoch starting before the first row."""
+        source = self.create_source()
+        with self.assertRaises( NoDataAvailableForEpoch ):
+            source.getNextEpochData( epoch_message( '2019-12-31T23:00:00Z' ), 'load1' )
+
+    def test_invalid_real_power(self):
+        """An invalid RealPower value is reported when the source is created."""
+        with self.assertRaises( CsvFileError ):
+            self.create_source( CSV_CONTENT + '2020-01-01T06:00:00Z,abc\n' )
+
+    def test_rows_not_in_time_order(self):
+        """Rows which are not in time order are reported when the source is created."""
+        content = '''TimeIndex,RealPower
+2020-01-01T00:00:00Z,0.1
+2020-01-01T02:00:00Z,0.3
+2020-01-01T01:00:00Z,0.2
+2020-01-01T03:00:00Z,0.4
+'''
+        with self.assertRaises( CsvFileError ):
+            self.create_source( content )
+
+    def test_missing_column(self):
+        """A missing required column is reported when the source is created."""
+        with self.assertRaises( CsvFileError ):
+            self.create_source( 'TimeIndex\n2020-01-01T00:00:00Z\n' )
+
+if __name__ == '__main__':
+    unittest.main()